@@ -1,10 +1,12 @@
-import os, io, zipfile, uuid, shutil, pathlib, json
+import os, io, zipfile, shutil, stat, pathlib, asyncio, hashlib, time, tempfile, secrets
+from collections import OrderedDict
 from fastapi import FastAPI, File, UploadFile, Form, Request
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi.responses import Response, HTMLResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
 import httpx
+import aiofiles
+import orjson
 
 BASE = pathlib.Path(__file__).parent
 TEMPLATE_DIR = BASE / "templates"
@@ -14,16 +16,64 @@ os.makedirs(TMP_DIR, exist_ok=True)
 
 app = FastAPI(title="Meme Coin Generator")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-templates = Jinja2Templates(directory=str(TEMPLATE_DIR))
+
+# --- Template output: compile sekali saat import, bukan per request
+env = Environment(loader=FileSystemLoader([TEMPLATE_DIR, BASE]), auto_reload=False, cache_size=-1)
+WEBSITE_TPL = env.get_template("website_index.j2")
+# ui.html tidak punya variabel: render sekali, simpan sebagai bytes
+UI_PAGE = env.get_template("ui.html").render().encode("utf-8")
 
 GROK_API_URL = os.environ.get("GROK_API_URL", "https://api.groq.ai/v1/chat/completions")
 GROK_API_KEY = os.environ.get("GROK_API_KEY", "")
 GROK_MODEL = os.environ.get("GROK_MODEL", "llama3-8b-8192")
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "3600"))
+
+# --- Helper: satu AsyncClient dipakai bersama (keep-alive ke API Grok)
+GROK: httpx.AsyncClient = None
+
+@app.on_event("startup")
+async def open_grok_client():
+    global GROK
+    GROK = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        headers={"Authorization": f"Bearer {GROK_API_KEY}"},
+    )
+
+@app.on_event("shutdown")
+async def close_grok_client():
+    await GROK.aclose()
+
+# --- Helper: cache LRU dengan TTL (CACHE_TTL detik)
+def cache_get(cache: OrderedDict, key: str):
+    hit = cache.get(key)
+    if hit and time.monotonic() - hit[0] < CACHE_TTL:
+        cache.move_to_end(key)
+        return hit[1]
+    return None
+
+def cache_put(cache: OrderedDict, key: str, value, maxsize: int) -> None:
+    cache[key] = (time.monotonic(), value)
+    cache.move_to_end(key)
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+
+# --- Helper: cache LRU jawaban Grok, key = (model, task, hash narrative)
+GROK_CACHE_SIZE = 1024
+_grok_cache = OrderedDict()
+
+def grok_cache_key(narrative: str, task: str) -> str:
+    digest = hashlib.blake2b(narrative.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{digest}|{task}|{GROK_MODEL}"
 
 # --- Helper: panggil Grok
-def call_grok(narrative: str, task: str) -> str:
+async def call_grok(narrative: str, task: str) -> str:
     if not GROK_API_KEY:
         return f"[GROK_DISABLED]\n{narrative}"
+    key = grok_cache_key(narrative, task)
+    hit = cache_get(_grok_cache, key)
+    if hit is not None:
+        return hit
     payload = {
         "model": GROK_MODEL,
         "messages": [
@@ -33,57 +83,108 @@ def call_grok(narrative: str, task: str) -> str:
         "temperature": 0.3,
         "max_tokens": 1200
     }
-    headers = {"Authorization": f"Bearer {GROK_API_KEY}", "Content-Type": "application/json"}
-    with httpx.Client(timeout=30.0) as client:
-        r = client.post(GROK_API_URL, json=payload, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-        return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    r = await GROK.post(GROK_API_URL, json=payload)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    cache_put(_grok_cache, key, content, GROK_CACHE_SIZE)
+    return content
+
+# --- ZIP: deflate level rendah cukup untuk bundle kecil yang langsung diunduh
+ZIP_LEVEL = 1
+ZIP_STORE_BELOW = 4096
+# hampir semua image/video sudah terkompresi: hanya format mentah ini yang di-deflate
+DEFLATE_MEDIA = {".svg", ".bmp", ".tif", ".tiff"}
+COPY_CHUNK = 1 << 16
+
+# --- Bundle: semua isi ZIP dibangun di memori sebagai {arcname: bytes}
+def build_bundle(context: dict, bot_texts: dict) -> dict:
+    return {
+        "index.html": WEBSITE_TPL.render(**context).encode("utf-8"),
+        "bot_texts.json": orjson.dumps(bot_texts, option=orjson.OPT_INDENT_2),
+    }
+
+# entry dari writestr default 0600 tanpa bit file biasa; samakan dengan zf.write (0644).
+# Tanggal tetap supaya isi yang sama selalu menghasilkan ZIP (dan ETag) yang sama.
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+def zip_entry(arc: str, compress_type: int) -> zipfile.ZipInfo:
+    zi = zipfile.ZipInfo(arc, date_time=ZIP_DATE)
+    zi.external_attr = (stat.S_IFREG | 0o644) << 16
+    zi.compress_type = compress_type
+    return zi
+
+# --- Render + zip: dijalankan di thread (baca media + zlib lepas dari event loop)
+def build_zip_bytes(context: dict, bot_texts: dict, media: pathlib.Path = None) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL) as zf:
+        for arc, data in build_bundle(context, bot_texts).items():
+            method = zipfile.ZIP_STORED if len(data) < ZIP_STORE_BELOW else zipfile.ZIP_DEFLATED
+            zf.writestr(zip_entry(arc, method), data, compresslevel=ZIP_LEVEL)
+        if media:
+            method = zipfile.ZIP_DEFLATED if media.suffix.lower() in DEFLATE_MEDIA else zipfile.ZIP_STORED
+            zi = zip_entry(media.name, method)
+            zi.file_size = media.stat().st_size
+            zi._compresslevel = ZIP_LEVEL  # zf.open() tidak memakai compresslevel arsip
+            with open(media, "rb") as src, zf.open(zi, "w") as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+    return buf.getvalue()
+
+# --- Helper: simpan upload per chunk (tanpa buffer seluruh file di RAM)
+UPLOAD_CHUNK = 1 << 20
+
+async def save_upload(file: UploadFile, save_to: pathlib.Path) -> None:
+    async with aiofiles.open(save_to, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK):
+            await f.write(chunk)
+
+# --- Bersihkan sisa folder kerja (mis. proses mati di tengah request)
+STALE_AFTER = 3600
+
+@app.on_event("startup")
+def sweep_tmp_dir():
+    cutoff = time.time() - STALE_AFTER
+    for stale in TMP_DIR.glob("*_*"):
+        if stale.is_dir() and stale.stat().st_mtime < cutoff:
+            shutil.rmtree(stale, ignore_errors=True)
 
 # --- Homepage form
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse("ui.html", {"request": request})
+    return HTMLResponse(UI_PAGE)
 
-# --- Generate ZIP project
-@app.post("/generate")
-async def generate(
-    request: Request,
-    narrative: str = Form(...),
-    coin_name: str = Form(...),
-    ticker: str = Form(...),
-    network: str = Form("Pump.fun"),
-    x_url: str = Form("https://x.com/"),
-    telegram_url: str = Form("https://t.me/"),
-    pump_fun: str = Form("https://pump.fun/"),
-    file: UploadFile = File(None)
-):
-    uid = str(uuid.uuid4())[:8]
-    work = TMP_DIR / f"gen_{uid}"
-    if work.exists():
-        shutil.rmtree(work)
-    work.mkdir(parents=True)
-
-    # save media
-    media_path = ""
-    if file:
-        ext = pathlib.Path(file.filename).suffix
-        save_to = work / f"media{ext}"
-        content = await file.read()
-        open(save_to, "wb").write(content)
-        media_path = save_to.name
+# --- Cache ZIP hasil per kombinasi input form (hanya request tanpa media)
+BUNDLE_CACHE_SIZE = 64
+_bundle_cache = OrderedDict()
+
+def bundle_cache_key(*fields: str) -> str:
+    h = hashlib.blake2b(GROK_MODEL.encode("utf-8"), digest_size=16)
+    for field in fields:
+        h.update(b"\0" + field.encode("utf-8"))
+    return h.hexdigest()
+
+# If-None-Match: daftar tag dipisah koma, W/ dibandingkan lemah. "*" sengaja
+# tidak dianggap cocok: ini POST, jadi "*" tidak boleh berujung 304.
+def etag_matches(header: str, etag: str) -> bool:
+    for tag in header.split(","):
+        if tag.strip().removeprefix("W/") == etag:
+            return True
+    return False
 
+# --- Pipeline: Grok -> render -> zip
+async def build_project(narrative, coin_name, ticker, network, x_url, telegram_url, pump_fun, file) -> bytes:
     # AI content
-    site_copy = call_grok(narrative, "Generate website tagline, intro, roadmap (plain text)")
-    bot_json = call_grok(narrative, "Generate JSON with arrays for bot responses")
+    site_copy, bot_json = await asyncio.gather(
+        call_grok(narrative, "Generate website tagline, intro, roadmap (plain text)"),
+        call_grok(narrative, "Generate JSON with arrays for bot responses"),
+    )
     try:
-        bot_texts = json.loads(bot_json)
+        bot_texts = orjson.loads(bot_json)
     except Exception:
         bot_texts = {"HYPE": ["LFG!"], "WISDOM": ["In chaos we trust."]}
 
-    # render website HTML
-    tpl = (TEMPLATE_DIR / "website_index.j2").read_text()
-    html = Template(tpl).render(
+    ext = os.path.splitext(file.filename)[1] if file else ""
+    context = dict(
         coin_name=coin_name,
         ticker=ticker,
         network=network,
@@ -93,22 +194,52 @@ async def generate(
         pump_fun=pump_fun,
         x_url=x_url,
         telegram_url=telegram_url,
-        media_filename=media_path
+        media_filename=f"media{ext}" if file else ""
     )
-    (work / "index.html").write_text(html, encoding="utf-8")
-    (work / "bot_texts.json").write_text(json.dumps(bot_texts, indent=2), encoding="utf-8")
 
-    # zip hasil
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for root, _, files in os.walk(work):
-            for f in files:
-                full = os.path.join(root, f)
-                arc = os.path.relpath(full, work)
-                zf.write(full, arc)
-    buf.seek(0)
+    # render + zip di thread; media hanya disimpan selama ZIP dibuat
+    with tempfile.TemporaryDirectory(prefix="gen_", dir=TMP_DIR) as tmp:
+        media = None
+        if file:
+            media = pathlib.Path(tmp) / f"media{ext}"
+            await save_upload(file, media)
+        return await asyncio.to_thread(build_zip_bytes, context, bot_texts, media)
+
+# --- Generate ZIP project
+@app.post("/generate")
+async def generate(
+    request: Request,
+    narrative: str = Form(...),
+    coin_name: str = Form(...),
+    ticker: str = Form(...),
+    network: str = Form("Pump.fun"),
+    x_url: str = Form("https://x.com/"),
+    telegram_url: str = Form("https://t.me/"),
+    pump_fun: str = Form("https://pump.fun/"),
+    file: UploadFile = File(None)
+):
+    uid = secrets.token_hex(4)
     headers = {"Content-Disposition": f"attachment; filename={coin_name}_{uid}.zip"}
-    return StreamingResponse(buf, media_type="application/zip", headers=headers)
+
+    # dengan media: tanpa cache/ETag (hash seluruh upload tidak sepadan)
+    if file:
+        zip_bytes = await build_project(narrative, coin_name, ticker, network, x_url, telegram_url, pump_fun, file)
+        return Response(zip_bytes, media_type="application/zip", headers=headers)
+
+    fields = (narrative, coin_name, ticker, network, x_url, telegram_url, pump_fun)
+    key = bundle_cache_key(*fields)
+    cached = cache_get(_bundle_cache, key)
+    if cached:
+        etag, zip_bytes = cached
+    else:
+        zip_bytes = await build_project(*fields, None)
+        etag = '"%s"' % hashlib.blake2b(zip_bytes, digest_size=16).hexdigest()
+        cache_put(_bundle_cache, key, (etag, zip_bytes), BUNDLE_CACHE_SIZE)
+
+    headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(zip_bytes, media_type="application/zip", headers=headers)
 
 # --- Preview website langsung
 @app.post("/preview", response_class=HTMLResponse)
@@ -123,23 +254,15 @@ async def preview(
     pump_fun: str = Form("https://pump.fun/"),
     file: UploadFile = File(None)
 ):
-    uid = str(uuid.uuid4())[:8]
-    work = TMP_DIR / f"preview_{uid}"
-    work.mkdir(parents=True, exist_ok=True)
-
+    # preview tidak menyajikan file media, cukup nama filenya
     media_filename = ""
     if file:
-        ext = pathlib.Path(file.filename).suffix
-        save_to = work / f"media{ext}"
-        content = await file.read()
-        open(save_to, "wb").write(content)
-        media_filename = save_to.name
+        media_filename = f"media{os.path.splitext(file.filename)[1]}"
 
     # AI content
-    site_copy = call_grok(narrative, "Generate website tagline, intro, roadmap (plain text)")
+    site_copy = await call_grok(narrative, "Generate website tagline, intro, roadmap (plain text)")
 
-    tpl = (TEMPLATE_DIR / "website_index.j2").read_text()
-    html = Template(tpl).render(
+    html = WEBSITE_TPL.render(
         coin_name=coin_name,
         ticker=ticker,
         network=network,